@@ -40,7 +40,7 @@ type SensorEnvelope = {
 };
 
 type ServerToClientEvents = {
-  connected: (payload: { message: string }) => void;
+  connected: (payload: { message: string; deviceId: string; devices: string[] }) => void;
   sensor_update: (payload: SensorEnvelope) => void;
   sensor_snapshot: (payload: SensorEnvelope) => void;
   error: (payload: { message: string }) => void;
@@ -57,6 +57,10 @@ type ClientToServerEvents = {
 
 type TelemetrySocket = Socket<ServerToClientEvents, ClientToServerEvents>;
 
+// Sent in the Socket.IO auth payload so the backend keeps routing this device's stream
+// under the same id across reconnects.
+const DEVICE_ID = `device-${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 10)}`;
+
 type SocketStatus = 'disconnected' | 'connecting' | 'connected' | 'error';
 
 const SOCKET_STATUS_LABEL: Record<SocketStatus, string> = {
@@ -317,6 +321,7 @@ function AppContent({ isDarkMode }: AppContentProps) {
     try {
       const socket: TelemetrySocket = io(trimmedUrl, {
         transports: ['websocket'],
+        auth: { deviceId: DEVICE_ID },
       });
 
       socketRef.current = socket;
@@ -1,28 +1,64 @@
 """Application entrypoint for the MotionMonitor backend service."""
 from __future__ import annotations
 
+# gevent must patch the standard library before anything else imports it.
+from gevent import monkey
+
+monkey.patch_all()
+
 import atexit
 import csv
+import math
 import os
+import threading
+import time
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Any, Dict
 
+import numpy as np
+import orjson
 from flask import Flask, jsonify, request
-from flask_socketio import SocketIO, emit
+from flask.json.provider import JSONProvider
+from flask_socketio import SocketIO, emit, join_room, leave_room
+from gevent import Timeout
 from twilio.rest import Client
 
+try:
+    from numba import njit
+except ImportError:  # pragma: no cover - numba is an optional accelerator
+
+    def njit(*args: Any, **kwargs: Any) -> Any:
+        """Fallback that leaves the decorated function as plain Python."""
+        return lambda func: func
+
+
+class OrjsonProvider(JSONProvider):
+    """JSON provider backed by orjson, shared by Flask responses and Socket.IO packets."""
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        # Socket.IO passes stdlib-only options such as ``separators``; orjson output is
+        # already compact, so they are ignored.
+        return orjson.dumps(obj).decode()
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+
 app = Flask(__name__)
 app.config["SECRET_KEY"] = "motion-monitor-backend"
+app.json = OrjsonProvider(app)
 
-# Use eventlet for compatibility with Flask-SocketIO on Windows/Python.
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode="eventlet")
+# gevent + gevent-websocket gives Flask-SocketIO a C-accelerated WebSocket frame parser.
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode="gevent", json=app.json)
 
 # --- Twilio setup for SMS notifications ---------------------------------------------
 TWILIO_ACCOUNT_SID = os.environ.get("TWILIO_ACCOUNT_SID")
 TWILIO_AUTH_TOKEN = os.environ.get("TWILIO_AUTH_TOKEN")
 TWILIO_PHONE_NUMBER = os.environ.get("TWILIO_PHONE_NUMBER")
 RECIPIENT_PHONE_NUMBER = "+440788663048"
+SMS_TIMEOUT_S = 5.0  # cap on a single Twilio request
+SMS_COOLDOWN_S = 30.0  # minimum gap between SMS alerts for one connection
 
 twilio_client = None
 if TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN and TWILIO_PHONE_NUMBER:
@@ -35,18 +71,25 @@ else:
 
 
 def send_sms_notification(message: str) -> None:
-    """Send an SMS notification using Twilio."""
+    """Send an SMS notification using Twilio.
+
+    This performs a blocking HTTPS request, so callers on the socket hot path should run
+    it with ``socketio.start_background_task``.
+    """
     if not twilio_client:
         app.logger.warning("Twilio client not initialized. Cannot send SMS.")
         return
 
     try:
-        twilio_client.messages.create(
-            body=message,
-            from_=TWILIO_PHONE_NUMBER,
-            to=RECIPIENT_PHONE_NUMBER,
-        )
+        with Timeout(SMS_TIMEOUT_S):
+            twilio_client.messages.create(
+                body=message,
+                from_=TWILIO_PHONE_NUMBER,
+                to=RECIPIENT_PHONE_NUMBER,
+            )
         app.logger.info("SMS notification sent to %s", RECIPIENT_PHONE_NUMBER)
+    except Timeout:
+        app.logger.error("Timed out sending SMS after %.1f s", SMS_TIMEOUT_S)
     except Exception as e:
         app.logger.error("Failed to send SMS: %s", e)
 
@@ -70,12 +113,95 @@ if not DATA_FILE.exists():
             ]
         )
 
-data_file_handle = DATA_FILE.open("a", newline="")
-data_writer = csv.writer(data_file_handle)
+# Rows are appended as preformatted bytes through a 64 KiB userspace buffer; csv.writer
+# is only used for the one-time header above. O_CLOEXEC/O_BINARY only exist on some
+# platforms, so they fall back to no-ops elsewhere.
+_data_fd = os.open(
+    DATA_FILE,
+    os.O_WRONLY
+    | os.O_CREAT
+    | os.O_APPEND
+    | getattr(os, "O_CLOEXEC", 0)
+    | getattr(os, "O_BINARY", 0),
+    0o644,
+)
+data_file_handle = os.fdopen(_data_fd, "ab", buffering=64 * 1024)
+
+# The log is write-mostly, so after each flush the kernel is told it can drop the
+# written pages from the page cache (not available on Windows/macOS).
+_HAS_FADVISE = hasattr(os, "posix_fadvise")
+
+# Matches the csv module's default dialect, including its "\r\n" line terminator.
+_CSV_ROW_FORMAT = b"%s,%s,%s,%s,%s,%s,%s,%s\r\n"
+_CSV_SPECIAL_CHARS = frozenset(',"\r\n')
+
+
+def _csv_field(value: Any) -> bytes:
+    """Encode a single CSV field the same way csv.writer would."""
+    if value is None:
+        return b""
+    if type(value) is float:
+        # NaN marks a missing reading and is logged as an empty field.
+        return str(value).encode() if value == value else b""
+    if type(value) is int:
+        return str(value).encode()
+    text = str(value)
+    if not _CSV_SPECIAL_CHARS.isdisjoint(text):
+        text = '"' + text.replace('"', '""') + '"'
+    return text.encode()
+
+
+# Rows are buffered in memory and written out in batches instead of flushing the file
+# on every sample; a batch is written once it reaches CSV_FLUSH_ROWS rows or when the
+# periodic flusher wakes up, whichever comes first.
+CSV_FLUSH_ROWS = 128
+CSV_FLUSH_INTERVAL_S = 1.0
+
+_csv_buffer: list[bytes] = []
+# The critical sections below never yield to the event loop, so a plain lock is safe
+# to share between the socket handlers and the background flusher.
+_csv_buffer_lock = threading.Lock()
+
+
+def _buffer_csv_row(row: bytes) -> None:
+    """Queue a row for the CSV log, writing the batch out once it is full."""
+    with _csv_buffer_lock:
+        _csv_buffer.append(row)
+        full = len(_csv_buffer) >= CSV_FLUSH_ROWS
+    if full:
+        _flush_csv()
+
+
+def _flush_csv() -> None:
+    """Write any buffered rows to the CSV file and flush it."""
+    global _csv_buffer
+
+    with _csv_buffer_lock:
+        if not _csv_buffer:
+            return
+        buf, _csv_buffer = _csv_buffer, []
+        data_file_handle.write(b"".join(buf))
+        data_file_handle.flush()
+        if _HAS_FADVISE:
+            os.posix_fadvise(_data_fd, 0, 0, os.POSIX_FADV_DONTNEED)
+
+
+def _periodic_flush() -> None:
+    """Drain the CSV buffer every CSV_FLUSH_INTERVAL_S seconds."""
+    while True:
+        socketio.sleep(CSV_FLUSH_INTERVAL_S)
+        try:
+            _flush_csv()
+        except Exception as error:  # pragma: no cover
+            app.logger.error("Error flushing CSV buffer: %s", error)
+
+
+socketio.start_background_task(_periodic_flush)
 
 
 @atexit.register
 def _close_data_file() -> None:
+    _flush_csv()
     data_file_handle.close()
 
 
@@ -85,10 +211,55 @@ IMPACT_THRESHOLD = 15.0  # m/s^2
 GYRO_IMPACT_THRESHOLD = 0.5  # rad/s
 FALL_TIME_WINDOW_MS = 1_000  # ms
 
-user_state: Dict[str, Dict[str, Any]] = {}
+# Magnitudes are compared in squared form so the hot path never needs a sqrt.
+FREEFALL_SQ = FREEFALL_THRESHOLD**2
+IMPACT_SQ = IMPACT_THRESHOLD**2
+GYRO_IMPACT_SQ = GYRO_IMPACT_THRESHOLD**2
+
+# Per-connection state is kept as parallel arrays (structure of arrays) indexed by a
+# slot number; each connection is assigned a slot on connect and returns it on disconnect.
+# The arrays double in size whenever every slot is taken, so connections are never refused.
+INITIAL_CLIENT_SLOTS = 1024
+
+in_freefall = np.zeros(INITIAL_CLIENT_SLOTS, dtype=np.bool_)
+freefall_time = np.zeros(INITIAL_CLIENT_SLOTS, dtype=np.float64)
+last_sms_time = np.full(INITIAL_CLIENT_SLOTS, -np.inf, dtype=np.float64)
+# hash() of the last accepted (acc, gyro, timestamp) tuple, used to drop retransmits.
+last_sample_hash = np.zeros(INITIAL_CLIENT_SLOTS, dtype=np.int64)
+
+client_slots: Dict[str, int] = {}
+_free_slots: list[int] = list(range(INITIAL_CLIENT_SLOTS - 1, -1, -1))
+
+
+def _grow_client_slots() -> None:
+    """Double the per-connection state arrays and add the new slots to the free list."""
+    global in_freefall, freefall_time, last_sms_time, last_sample_hash
+
+    old_size = len(in_freefall)
+    new_size = old_size * 2
+    # np.resize fills the new tail by repeating existing entries; every slot is reset in
+    # on_connect before use, so those values are never read.
+    in_freefall = np.resize(in_freefall, new_size)
+    freefall_time = np.resize(freefall_time, new_size)
+    last_sms_time = np.resize(last_sms_time, new_size)
+    last_sample_hash = np.resize(last_sample_hash, new_size)
+    _free_slots.extend(range(new_size - 1, old_size - 1, -1))
+    app.logger.info("Grew client state arrays to %d slots", new_size)
+
+# Return values of _fall_kernel.
+FALL_EVENT_NONE = 0
+FALL_EVENT_FALL = 1
+FALL_EVENT_EXIT_FREEFALL = 2
+FALL_EVENT_ENTER_FREEFALL = 3
 
 
 def _coerce_float(value: Any, fallback: float = 0.0) -> float:
+    # JSON numbers arrive as float or int, so skip the try block for those.
+    value_type = type(value)
+    if value_type is float:
+        return value
+    if value_type is int:
+        return float(value)
     try:
         return float(value)
     except (TypeError, ValueError):
@@ -96,73 +267,151 @@ def _coerce_float(value: Any, fallback: float = 0.0) -> float:
 
 
 def _coerce_timestamp_ms(value: Any) -> float:
+    value_type = type(value)
+    if value_type is float:
+        return value
+    if value_type is int:
+        return float(value)
     try:
         return float(value)
     except (TypeError, ValueError):
-        return datetime.utcnow().timestamp() * 1000.0
-
-
-def _check_for_fall(
+        return time.time() * 1000.0
+
+
+@njit(cache=True)
+def _fall_kernel(
+    slot: int,
+    acc_x: float,
+    acc_y: float,
+    acc_z: float,
+    gyro_x: float,
+    gyro_y: float,
+    gyro_z: float,
+    timestamp_ms: float,
+    in_freefall: np.ndarray,
+    freefall_time: np.ndarray,
+    freefall_sq: float,
+    impact_sq: float,
+    gyro_impact_sq: float,
+    window_ms: float,
+) -> int:
+    """Advance the freefall/impact state machine for one slot and report what happened."""
+    acc_mag_sq = acc_x * acc_x + acc_y * acc_y + acc_z * acc_z
+    gyro_mag_sq = gyro_x * gyro_x + gyro_y * gyro_y + gyro_z * gyro_z
+
+    event = FALL_EVENT_NONE
+    if in_freefall[slot]:
+        elapsed = timestamp_ms - freefall_time[slot]
+        if acc_mag_sq > impact_sq and gyro_mag_sq > gyro_impact_sq and elapsed < window_ms:
+            in_freefall[slot] = False
+            return FALL_EVENT_FALL
+        if elapsed >= window_ms:
+            in_freefall[slot] = False
+            event = FALL_EVENT_EXIT_FREEFALL
+
+    if acc_mag_sq < freefall_sq:
+        in_freefall[slot] = True
+        freefall_time[slot] = timestamp_ms
+        event = FALL_EVENT_ENTER_FREEFALL
+
+    return event
+
+
+# Compile the kernel at import time rather than on the first sensor frame.
+_fall_kernel(
+    0,
+    0.0,
+    0.0,
+    0.0,
+    0.0,
+    0.0,
+    0.0,
+    0.0,
+    np.zeros(1, dtype=np.bool_),
+    np.zeros(1, dtype=np.float64),
+    FREEFALL_SQ,
+    IMPACT_SQ,
+    GYRO_IMPACT_SQ,
+    FALL_TIME_WINDOW_MS,
+)
+
+
+def _check_for_fall_fast(
     sid: str,
-    acc_x: Any,
-    acc_y: Any,
-    acc_z: Any,
-    gyro_x: Any,
-    gyro_y: Any,
-    gyro_z: Any,
-    timestamp_ms: Any,
+    acc_x: float,
+    acc_y: float,
+    acc_z: float,
+    gyro_x: float,
+    gyro_y: float,
+    gyro_z: float,
+    timestamp_ms: float,
 ) -> None:
-    if sid not in user_state:
+    """Run fall detection on readings that have already been coerced to float."""
+    slot = client_slots.get(sid)
+    if slot is None:
         return
 
-    state = user_state[sid]
-    acc_x_f = _coerce_float(acc_x)
-    acc_y_f = _coerce_float(acc_y)
-    acc_z_f = _coerce_float(acc_z)
-    gyro_x_f = _coerce_float(gyro_x)
-    gyro_y_f = _coerce_float(gyro_y)
-    gyro_z_f = _coerce_float(gyro_z)
-    timestamp_value = _coerce_timestamp_ms(timestamp_ms)
+    event = _fall_kernel(
+        slot,
+        acc_x,
+        acc_y,
+        acc_z,
+        gyro_x,
+        gyro_y,
+        gyro_z,
+        timestamp_ms,
+        in_freefall,
+        freefall_time,
+        FREEFALL_SQ,
+        IMPACT_SQ,
+        GYRO_IMPACT_SQ,
+        FALL_TIME_WINDOW_MS,
+    )
+    if event != FALL_EVENT_FALL:
+        return
 
-    acc_mag = (acc_x_f**2 + acc_y_f**2 + acc_z_f**2) ** 0.5
-    gyro_mag = (gyro_x_f**2 + gyro_y_f**2 + gyro_z_f**2) ** 0.5
-
-    if state.get("in_freefall"):
-        elapsed = timestamp_value - state.get("freefall_time", 0.0)
-        if (
-            acc_mag > IMPACT_THRESHOLD
-            and gyro_mag > GYRO_IMPACT_THRESHOLD
-            and elapsed < FALL_TIME_WINDOW_MS
-        ):
-            fall_time = _current_timestamp()
-            fall_message = (
-                "Fall detected at "
-                f"{fall_time} with |a|={acc_mag:.2f} m/s^2 and |omega|={gyro_mag:.2f} rad/s."
-            )
-            socketio.emit(
-                "fall_detected",
-                {
-                    "message": "Fall detected",
-                    "timestamp": fall_time,
-                    "acceleration": acc_mag,
-                },
-                to=sid,
-                namespace="/stream",
-            )
-            app.logger.warning("Fall detected for connection %s", sid)
-            send_sms_notification(fall_message)
-            state["in_freefall"] = False
-        elif elapsed >= FALL_TIME_WINDOW_MS:
-            state["in_freefall"] = False
+    acc_mag = math.sqrt(acc_x * acc_x + acc_y * acc_y + acc_z * acc_z)
+    gyro_mag = math.sqrt(gyro_x * gyro_x + gyro_y * gyro_y + gyro_z * gyro_z)
+    fall_time = _current_timestamp()
+    fall_message = (
+        "Fall detected at "
+        f"{fall_time} with |a|={acc_mag:.2f} m/s^2 and |omega|={gyro_mag:.2f} rad/s."
+    )
+    socketio.emit(
+        "fall_detected",
+        {
+            "message": "Fall detected",
+            "timestamp": fall_time,
+            "acceleration": acc_mag,
+        },
+        to=sid,
+        namespace="/stream",
+    )
+    app.logger.warning("Fall detected for connection %s", sid)
+    now = time.monotonic()
+    if now - last_sms_time[slot] >= SMS_COOLDOWN_S:
+        last_sms_time[slot] = now
+        socketio.start_background_task(send_sms_notification, fall_message)
 
-    if acc_mag < FREEFALL_THRESHOLD:
-        state["in_freefall"] = True
-        state["freefall_time"] = timestamp_value
+
+# Last formatted timestamp as (wall-clock millisecond, ISO string). The string only has
+# millisecond resolution, so it is reused until the wall-clock millisecond changes.
+_timestamp_cache: tuple[int, str] | None = None
+_EPOCH = datetime(1970, 1, 1)
 
 
 def _current_timestamp() -> str:
     """Return an ISO 8601 UTC timestamp."""
-    return datetime.utcnow().isoformat(timespec="milliseconds") + "Z"
+    global _timestamp_cache
+
+    now_ms = time.time_ns() // 1_000_000
+    cached = _timestamp_cache
+    if cached is not None and cached[0] == now_ms:
+        return cached[1]
+
+    iso_str = (_EPOCH + timedelta(milliseconds=now_ms)).isoformat(timespec="milliseconds") + "Z"
+    _timestamp_cache = (now_ms, iso_str)
+    return iso_str
 
 
 @app.get("/health")
@@ -178,165 +427,296 @@ def sensor_snapshot() -> Any:
     if payload is None:
         return jsonify(message="Invalid or missing JSON body."), 400
 
-    payload.setdefault("receivedAt", _current_timestamp())
+    if "receivedAt" not in payload:
+        payload["receivedAt"] = _current_timestamp()
     socketio.emit("sensor_snapshot", payload, namespace="/stream")
 
     # Log the snapshot to CSV
-    acc = payload.get("accelerometer", {}) or {}
-    gyro = payload.get("gyroscope", {}) or {}
+    acc = payload.get("accelerometer") or {}
+    gyro = payload.get("gyroscope") or {}
     timestamp_ms = payload.get("timestamp")
 
     try:
-        data_writer.writerow(
-            [
-                payload["receivedAt"],
-                timestamp_ms,
-                acc.get("x"),
-                acc.get("y"),
-                acc.get("z"),
-                gyro.get("x"),
-                gyro.get("y"),
-                gyro.get("z"),
-            ]
+        _buffer_csv_row(
+            _CSV_ROW_FORMAT
+            % (
+                _csv_field(payload["receivedAt"]),
+                _csv_field(timestamp_ms),
+                _csv_field(acc.get("x")),
+                _csv_field(acc.get("y")),
+                _csv_field(acc.get("z")),
+                _csv_field(gyro.get("x")),
+                _csv_field(gyro.get("y")),
+                _csv_field(gyro.get("z")),
+            )
         )
-        data_file_handle.flush()
+        _flush_csv()
     except Exception as error:  # pragma: no cover
         app.logger.error("Error writing snapshot to CSV: %s", error)
 
     return jsonify(message="Snapshot received."), 200
 
 
+# Device id each connection streams under, keyed by sid. Devices declare a stable id in
+# the connect ``auth`` payload so dashboard subscriptions survive reconnects; connections
+# without one fall back to their sid.
+client_devices: Dict[str, str] = {}
+# Devices that declared an id and are announced to dashboards: device id -> connection count.
+_announced_devices: Dict[str, int] = {}
+
+
 @socketio.on("connect", namespace="/stream")
-def on_connect() -> None:
+def on_connect(auth: Any = None) -> None:
     """Notify the newly connected WebSocket client and initialize state."""
-    emit("connected", {"message": "Connected to MotionMonitor stream."})
-    user_state[request.sid] = {"in_freefall": False, "freefall_time": 0.0}
+    if not _free_slots:
+        _grow_client_slots()
+
+    slot = _free_slots.pop()
+    in_freefall[slot] = False
+    freefall_time[slot] = 0.0
+    last_sms_time[slot] = -np.inf
+    last_sample_hash[slot] = 0
+    client_slots[request.sid] = slot
+
+    declared_id = auth.get("deviceId") if type(auth) is dict else None
+    declared = type(declared_id) is str and bool(declared_id)
+    device_id = declared_id if declared else request.sid
+    client_devices[request.sid] = device_id
+    # Each device is subscribed to its own updates so it keeps receiving its echo.
+    join_room(_device_room(device_id))
+    emit(
+        "connected",
+        {
+            "message": "Connected to MotionMonitor stream.",
+            "deviceId": device_id,
+            "devices": sorted(_announced_devices),
+        },
+    )
+
+    if declared:
+        count = _announced_devices.get(device_id, 0)
+        _announced_devices[device_id] = count + 1
+        if count == 0:
+            emit("device_connected", {"deviceId": device_id}, broadcast=True, include_self=False)
+
+
+def _device_room(device_id: str) -> str:
+    """Return the room that receives a device's sensor updates."""
+    return f"dev:{device_id}"
+
+
+@socketio.on("subscribe", namespace="/stream")
+def on_subscribe(device_id: Any) -> None:
+    """Start forwarding a device's sensor updates to the calling client."""
+    if type(device_id) is not str or not device_id:
+        emit("error", {"message": "Expected a device id string."})
+        return
+    join_room(_device_room(device_id))
+
+
+@socketio.on("unsubscribe", namespace="/stream")
+def on_unsubscribe(device_id: Any) -> None:
+    """Stop forwarding a device's sensor updates to the calling client."""
+    if type(device_id) is not str or not device_id:
+        emit("error", {"message": "Expected a device id string."})
+        return
+    leave_room(_device_room(device_id))
 
 
 @socketio.on("disconnect", namespace="/stream")
 def on_disconnect() -> None:
     """Handle client disconnects."""
     app.logger.info("WebSocket client disconnected")
-    user_state.pop(request.sid, None)
+    slot = client_slots.pop(request.sid, None)
+    if slot is not None:
+        _free_slots.append(slot)
+
+    device_id = client_devices.pop(request.sid, None)
+    count = _announced_devices.get(device_id, 0)
+    if count > 1:
+        _announced_devices[device_id] = count - 1
+    elif count == 1:
+        del _announced_devices[device_id]
+        socketio.emit("device_disconnected", {"deviceId": device_id}, namespace="/stream")
 
 
 @socketio.on("sensor_update", namespace="/stream")
 def on_sensor_update(data: Dict[str, Any]) -> None:
-    """Broadcast live sensor updates to all subscribed clients and log them."""
-    if not isinstance(data, dict):
+    """Forward live sensor updates to clients subscribed to the device and log them."""
+    if type(data) is not dict:
         emit("error", {"message": "Expected dict payload."})
         return
 
-    data.setdefault("receivedAt", _current_timestamp())
+    # request is a LocalProxy and these helpers are module globals; bind each once
+    # rather than resolving them on every use below.
+    sid = request.sid
+    coerce = _coerce_float
+    csv_field = _csv_field
+    nan = math.nan
+
+    if "receivedAt" not in data:
+        data["receivedAt"] = _current_timestamp()
+
+    acc = data.get("accelerometer") or {}
+    gyro = data.get("gyroscope") or {}
+    if type(acc) is not dict or type(gyro) is not dict:
+        emit("error", {"message": "Expected accelerometer and gyroscope objects."})
+        return
 
-    acc = data.get("accelerometer", {}) or {}
-    gyro = data.get("gyroscope", {}) or {}
+    # Coerce every axis once; missing or invalid readings become NaN, which is logged as
+    # an empty CSV field and never satisfies a fall-detection threshold.
+    acc_get = acc.get
+    gyro_get = gyro.get
+    acc_x = coerce(acc_get("x"), nan)
+    acc_y = coerce(acc_get("y"), nan)
+    acc_z = coerce(acc_get("z"), nan)
+    gyro_x = coerce(gyro_get("x"), nan)
+    gyro_y = coerce(gyro_get("y"), nan)
+    gyro_z = coerce(gyro_get("z"), nan)
     timestamp_ms = data.get("timestamp")
+    timestamp_value = _coerce_timestamp_ms(timestamp_ms)
+
+    # A retransmitted frame carries the same readings and client timestamp; skip the
+    # CSV write, fall check and fan-out for it.
+    slot = client_slots.get(sid)
+    if slot is not None:
+        sample_hash = hash((acc_x, acc_y, acc_z, gyro_x, gyro_y, gyro_z, timestamp_value))
+        if sample_hash == last_sample_hash[slot]:
+            return
+        last_sample_hash[slot] = sample_hash
 
     try:
-        data_writer.writerow(
-            [
-                data["receivedAt"],
-                timestamp_ms,
-                acc.get("x"),
-                acc.get("y"),
-                acc.get("z"),
-                gyro.get("x"),
-                gyro.get("y"),
-                gyro.get("z"),
-            ]
+        _buffer_csv_row(
+            _CSV_ROW_FORMAT
+            % (
+                csv_field(data["receivedAt"]),
+                csv_field(timestamp_ms),
+                csv_field(acc_x),
+                csv_field(acc_y),
+                csv_field(acc_z),
+                csv_field(gyro_x),
+                csv_field(gyro_y),
+                csv_field(gyro_z),
+            )
         )
-        data_file_handle.flush()
     except Exception as error:  # pragma: no cover
         app.logger.error("Error writing to CSV: %s", error)
 
     try:
-        _check_for_fall(
-            request.sid,
-            acc.get("x"),
-            acc.get("y"),
-            acc.get("z"),
-            gyro.get("x"),
-            gyro.get("y"),
-            gyro.get("z"),
-            timestamp_ms,
+        _check_for_fall_fast(
+            sid,
+            acc_x,
+            acc_y,
+            acc_z,
+            gyro_x,
+            gyro_y,
+            gyro_z,
+            timestamp_value,
         )
     except Exception as error:  # pragma: no cover
         app.logger.error("Error in fall detection: %s", error)
 
-    emit("sensor_update", data, broadcast=True)
+    # Socket.IO encodes a room packet once and reuses it for every receiver, so the dict
+    # is passed through as-is; emitting on the server skips the per-call request context
+    # lookups done by flask_socketio.emit().
+    socketio.emit(
+        "sensor_update", data, to=_device_room(client_devices.get(sid, sid)), namespace="/stream"
+    )
 
 
 # --- Gait analysis -------------------------------------------------------------
+_GAIT_COLUMNS = ("server_timestamp_utc", "acc_x", "acc_y", "acc_z")
+
+# Last analysis result keyed by the log's (st_size, st_mtime_ns); the log is append-only,
+# so an unchanged key means the result would be identical.
+_gait_cache: tuple[tuple[int, int], dict | None] | None = None
+
+
 def analyze_gait() -> dict | None:
     """Analyze gait from sensor data using FFT to compute cadence."""
+    global _gait_cache
+
+    if not DATA_FILE.exists():
+        return None
+
+    _flush_csv()
+
+    stat = DATA_FILE.stat()
+    key = (stat.st_size, stat.st_mtime_ns)
+    if _gait_cache is not None and _gait_cache[0] == key:
+        return _gait_cache[1]
+
+    result = _compute_gait()
+    _gait_cache = (key, result)
+    return result
+
+
+def _compute_gait() -> dict | None:
     try:
-        import numpy as np
-        from scipy.fft import fft, fftfreq
+        import pandas as pd
+        from scipy.fft import rfft, rfftfreq
     except ImportError:
         return None
 
-    if not DATA_FILE.exists():
+    # Parse the log in a single pass with pandas' C reader; malformed values become
+    # NaN/NaT and are masked out below instead of being skipped row by row.
+    try:
+        frame = pd.read_csv(DATA_FILE, usecols=list(_GAIT_COLUMNS), on_bad_lines="skip")
+    except ValueError:
         return None
 
-    rows = []
-    with DATA_FILE.open("r", newline="") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            rows.append(row)
+    timestamps = (
+        pd.to_datetime(frame["server_timestamp_utc"], utc=True, format="ISO8601", errors="coerce")
+        .dt.tz_convert(None)
+        .to_numpy(dtype="datetime64[ns]")
+    )
+    acc = (
+        frame[["acc_x", "acc_y", "acc_z"]]
+        .apply(pd.to_numeric, errors="coerce")
+        .to_numpy(dtype=np.float64)
+    )
 
-    if len(rows) < 2:
-        return None
+    valid = ~np.isnat(timestamps) & np.isfinite(acc).all(axis=1)
+    timestamps = timestamps[valid]
+    acc = acc[valid]
 
-    # Parse and validate data
-    valid_rows = []
-    for row in rows:
-        try:
-            ts_str = row["server_timestamp_utc"].replace('Z', '+00:00')
-            ts = datetime.fromisoformat(ts_str)
-            x = float(row["acc_x"].strip())
-            y = float(row["acc_y"].strip())
-            z = float(row["acc_z"].strip())
-            valid_rows.append((ts, x, y, z))
-        except (ValueError, TypeError, KeyError):
-            continue
-
-    if len(valid_rows) < 2:
+    if len(timestamps) < 2:
         return None
 
     # Sort by timestamp
-    valid_rows.sort(key=lambda x: x[0])
+    order = np.argsort(timestamps, kind="stable")
+    timestamps = timestamps[order]
+    acc = acc[order]
 
     # Filter to last 60 seconds
-    if len(valid_rows) > 1:
-        latest_ts = valid_rows[-1][0]
-        cutoff = latest_ts - timedelta(seconds=60)
-        valid_rows = [row for row in valid_rows if row[0] >= cutoff]
+    recent = timestamps >= timestamps[-1] - np.timedelta64(60, "s")
+    timestamps = timestamps[recent]
+    acc = acc[recent]
 
-    if len(valid_rows) < 2:
+    if len(timestamps) < 2:
         return None
 
-    timestamps, acc_x, acc_y, acc_z = zip(*valid_rows)
-
     # Compute mean dt
-    dts = [(timestamps[i + 1] - timestamps[i]).total_seconds() for i in range(len(timestamps) - 1)]
-    dts = [d for d in dts if d > 0]
-    if not dts:
+    dts = np.diff(timestamps) / np.timedelta64(1, "s")
+    dts = dts[dts > 0]
+    if dts.size == 0:
         return None
-    dt = np.mean(dts)
+    dt = dts.mean()
     if dt <= 0 or np.isnan(dt):
         return None
 
     fs = 1 / dt
 
-    acc_mag = np.sqrt(np.array(acc_x) ** 2 + np.array(acc_y) ** 2 + np.array(acc_z) ** 2)
+    acc_mag = np.sqrt((acc * acc).sum(axis=1))
 
     N = len(acc_mag)
-    yf = fft(acc_mag)
-    xf = fftfreq(N, 1 / fs)
-
-    positive_freqs = xf[xf > 0]
-    magnitudes = np.abs(yf[xf > 0])
+    # The signal is real, so only the non-negative half of the spectrum is needed. Keep
+    # the strictly positive bins below Nyquist: bin 0 is DC, and for even N the last rfft
+    # bin is fs/2, which fftfreq reports as -fs/2 and the full-FFT mask never considered.
+    positive = slice(1, (N + 1) // 2)
+    yf = rfft(acc_mag)
+    positive_freqs = rfftfreq(N, 1 / fs)[positive]
+    magnitudes = np.abs(yf[positive])
 
     if len(magnitudes) == 0 or np.any(np.isnan(magnitudes)):
         return None
@@ -373,7 +753,6 @@ if __name__ == "__main__":
             app,
             host="0.0.0.0",
             port=port,
-            allow_unsafe_werkzeug=True,
             log_output=True,
         )
     except Exception as error:  # pragma: no cover